@@ -2,13 +2,79 @@
 Tic Tac Toe Player
 """
 
-import copy
 import math
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# The 8 winning lines of the board as (i, j) triples.
+LINES = (
+    ((0, 0), (0, 1), (0, 2)),
+    ((1, 0), (1, 1), (1, 2)),
+    ((2, 0), (2, 1), (2, 2)),
+    ((0, 0), (1, 0), (2, 0)),
+    ((0, 1), (1, 1), (2, 1)),
+    ((0, 2), (1, 2), (2, 2)),
+    ((0, 0), (1, 1), (2, 2)),
+    ((0, 2), (1, 1), (2, 0)),
+)
+
+# The search works on a pair of 9-bit bitboards (x_bits, o_bits), where
+# cell (i, j) is bit 3 * i + j, plus the mask of still empty cells that is
+# updated move by move. These are the 8 winning lines as masks.
+WIN_MASKS = (0o007, 0o070, 0o700, 0o111, 0o222, 0o444, 0o421, 0o124)
+FULL_BOARD = 0x1FF
+
+# Center first, then corners, then edges, so alpha-beta prunes early.
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+MOVE_BITS = tuple(1 << idx for idx in MOVE_ORDER)
+
+# HAS_LINE[bits] tells whether a player's bitboard completes a line, so the
+# search checks for a win with one lookup instead of eight mask tests.
+HAS_LINE = tuple(
+    any(bits & m == m for m in WIN_MASKS) for bits in range(FULL_BOARD + 1)
+)
+
+# Transposition table: (x_bits, o_bits, turn) -> (value, flag), where the
+# flag tells whether value is exact or only a lower/upper bound.
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+TT = {}
+
+
+def _symmetries():
+    """
+    Returns the 8 rotations/reflections of the board as bit permutations,
+    PERM[k][bit] being where bit lands under symmetry k.
+    """
+    perms = []
+    cells = [(i, j) for i in range(3) for j in range(3)]
+    for reflect in (False, True):
+        for turns in range(4):
+            perm = []
+            for i, j in cells:
+                if reflect:
+                    j = 2 - j
+                for _ in range(turns):
+                    i, j = j, 2 - i
+                perm.append(3 * i + j)
+            perms.append(tuple(perm))
+    return tuple(perms)
+
+
+PERM = _symmetries()
+
+# PERMUTED[k][bits] is bits with every bit moved according to PERM[k].
+PERMUTED = tuple(
+    tuple(
+        sum(1 << perm[bit] for bit in range(9) if bits & (1 << bit))
+        for bits in range(FULL_BOARD + 1)
+    )
+    for perm in PERM
+)
+
 
 def initial_state():
     """
@@ -61,8 +127,8 @@ def result(board, action):
         if action[i] < 0 or action[i] > 2:
             raise ValueError()
     
-    board_copy = copy.deepcopy(board)
-    current_player = player(board_copy)
+    board_copy = [row[:] for row in board]
+    current_player = player(board)
     board_copy[action[0]][action[1]] = current_player
     return board_copy
 
@@ -71,28 +137,11 @@ def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    for row in board:
-        if row.count(X) == 3:
-            return X
-        elif row.count(O) == 3:
-            return O
-
-    for i in range(3):    
-        if [row[i] for row in board] == [X, X, X]:
-            return X    
-        if [row[i] for row in board] == [O, O, O]:
-            return O
-    
-    if board[0][0] == X and board[1][1] == X and board[2][2] == X:
-        return X
-    elif board[0][2] == X and board[1][1] == X and board[2][0] == X:
-        return X
-    
-    if board[0][0] == O and board[1][1] == O and board[2][2] == O:
-        return O
-    elif board[0][2] == O and board[1][1] == O and board[2][0] == O:
-        return O
-    
+    for (i0, j0), (i1, j1), (i2, j2) in LINES:
+        a, b, c = board[i0][j0], board[i1][j1], board[i2][j2]
+        if a is not EMPTY and a == b == c:
+            return a
+
     return None
     
 
@@ -105,7 +154,7 @@ def terminal(board):
         return True
     
     for row in board:
-        if row.count(EMPTY) > 0:
+        if EMPTY in row:
             return False
     
     return True
@@ -127,60 +176,145 @@ def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
-    current_player = player(board)
-    possible_actions = actions(board)
- 
-    current_max_value = -999
-    current_min_value = 999
-
-    optimal_action = None
-    
     if terminal(board):
         return None
-    
-    for action in possible_actions:
+
+    x_bits, o_bits = to_bits(board)
+    empties = ~(x_bits | o_bits) & FULL_BOARD
+    current_player = player_bits(x_bits, o_bits)
+
+    alpha = -math.inf
+    beta = math.inf
+
+    optimal_action = None
+
+    for bit in actions_bits(empties):
+        action = divmod(bit.bit_length() - 1, 3)
         if current_player == X:
-            action_value = min_value(result(board, action))
-            if action_value > current_max_value:
-                current_max_value = action_value
+            action_value = min_value(x_bits | bit, o_bits, empties ^ bit, alpha, beta)
+            if action_value > alpha:
+                alpha = action_value
                 optimal_action = action
         else:
-            action_value = max_value(result(board, action))
-            if action_value < current_min_value:
-                current_min_value = action_value
-                optimal_action = action    
-    
+            action_value = max_value(x_bits, o_bits | bit, empties ^ bit, alpha, beta)
+            if action_value < beta:
+                beta = action_value
+                optimal_action = action
+
     return optimal_action
 
 
-def max_value(board):
+def max_value(x_bits, o_bits, empties, alpha, beta):
+    # X is to move, so only O can have just completed a line
+    if HAS_LINE[o_bits]:
+        return -1
+    if not empties:
+        return 0
     v = -999
-    if terminal(board):
-        return utility(board)
-    for action in actions(board):
-        v = max(v, min_value(result(board, action)))
-        if v == 1:
-            return v
+    key = (*canonical(x_bits, o_bits), 0)
+    stored = tt_lookup(key, alpha, beta)
+    if stored is not None:
+        return stored
+    alpha_orig = alpha
+    for bit in MOVE_BITS:
+        if not empties & bit:
+            continue
+        v = max(v, min_value(x_bits | bit, o_bits, empties ^ bit, alpha, beta))
+        if v >= beta:
+            break
+        alpha = max(alpha, v)
+    tt_store(key, v, alpha_orig, beta)
     return v
 
-def min_value(board):
+def min_value(x_bits, o_bits, empties, alpha, beta):
+    # O is to move, so only X can have just completed a line
+    if HAS_LINE[x_bits]:
+        return 1
+    if not empties:
+        return 0
     v = 999
-    if terminal(board):
-        return utility(board)
-    for action in actions(board):
-        v = min(v, max_value(result(board, action)))
-        if v == -1:
-            return v
+    key = (*canonical(x_bits, o_bits), 1)
+    stored = tt_lookup(key, alpha, beta)
+    if stored is not None:
+        return stored
+    beta_orig = beta
+    for bit in MOVE_BITS:
+        if not empties & bit:
+            continue
+        v = min(v, max_value(x_bits, o_bits | bit, empties ^ bit, alpha, beta))
+        if v <= alpha:
+            break
+        beta = min(beta, v)
+    tt_store(key, v, alpha, beta_orig)
     return v 
 
-def max(a, b):
-    if a < b:
-        return b
-    else:
-        return a
 
-def min(a, b):
-    if a > b:
-        return b
+def canonical(x_bits, o_bits):
+    """
+    Returns the smallest of the 8 symmetric images of a bitboard pair,
+    so equivalent positions share one transposition table entry.
+    """
+    return min((table[x_bits], table[o_bits]) for table in PERMUTED)
+
+
+def tt_lookup(key, alpha, beta):
+    """
+    Returns the stored value for key if it settles the (alpha, beta)
+    window, None otherwise.
+    """
+    entry = TT.get(key)
+    if entry is None:
+        return None
+    value, flag = entry
+    if flag == EXACT:
+        return value
+    if flag == LOWER_BOUND and value >= beta:
+        return value
+    if flag == UPPER_BOUND and value <= alpha:
+        return value
+    return None
+
+
+def tt_store(key, value, alpha, beta):
+    """
+    Stores value for key, flagged against the window it was searched with.
+    """
+    if value <= alpha:
+        TT[key] = (value, UPPER_BOUND)
+    elif value >= beta:
+        TT[key] = (value, LOWER_BOUND)
     else:
-        return a
\ No newline at end of file
+        TT[key] = (value, EXACT)
+
+
+def to_bits(board):
+    """
+    Returns the (x_bits, o_bits) bitboard pair for a board.
+    """
+    x_bits = 0
+    o_bits = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x_bits |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o_bits |= 1 << (3 * i + j)
+    return x_bits, o_bits
+
+
+def player_bits(x_bits, o_bits):
+    """
+    Returns player who has the next turn on a bitboard pair.
+    """
+    if bin(x_bits).count("1") == bin(o_bits).count("1"):
+        return X
+    return O
+
+
+def actions_bits(empties):
+    """
+    Returns the bits of the empty cells in empties, in MOVE_ORDER.
+    """
+    for bit in MOVE_BITS:
+        if empties & bit:
+            yield bit
\ No newline at end of file
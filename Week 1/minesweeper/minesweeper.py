@@ -1,6 +1,19 @@
 import itertools
-from pickle import EMPTY_SET
 import random
+from collections import deque
+
+# Number of set bits, i.e. cells, in a sentence's cells bitmask
+popcount = int.bit_count
+
+
+def bits_of(bits):
+    """
+    Yields each set bit of bits as its own single-bit integer.
+    """
+    while bits:
+        bit = bits & -bits
+        yield bit
+        bits ^= bit
 
 
 class Minesweeper():
@@ -13,23 +26,26 @@ class Minesweeper():
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
-        self.mines = set()
 
         # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
+        self.board = [[False] * width for _ in range(height)]
 
         # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        positions = random.sample(range(height * width), mines)
+        self.mines = {divmod(k, width) for k in positions}
+
+        # Count the mines around every cell once, by adding each
+        # mine to the counts of the in-bounds cells around it
+        self.counts = [[0] * width for _ in range(height)]
+        for i, j in self.mines:
+            self.board[i][j] = True
+            for ni in range(max(i - 1, 0), min(i + 2, height)):
+                row = self.counts[ni]
+                for nj in range(max(j - 1, 0), min(j + 2, width)):
+                    row[nj] += 1
+
+            # The loop above counted the mine as its own neighbor
+            self.counts[i][j] -= 1
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -60,23 +76,8 @@ class Minesweeper():
         not including the cell itself.
         """
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+        i, j = cell
+        return self.counts[i][j]
 
     def won(self):
         """
@@ -90,56 +91,82 @@ class Sentence():
     Logical statement about a Minesweeper game
     A sentence consists of a set of board cells,
     and a count of the number of those cells which are mines.
+
+    The cells are stored as an integer bitmask over the board
+    (see MinesweeperAI.cell_bit), so set operations are single
+    integer operations.
+
+    Sentences are hashable so they can live in sets and dicts; the hash
+    is cached and reset whenever the sentence changes, so a sentence must
+    be taken out of any set or dict before it is changed.
     """
 
     def __init__(self, cells, count):
-        self.cells = set(cells)
+        self.cells = cells
         self.count = count
+        self._hash = None
 
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash((self.cells, self.count))
+        return self._hash
     
     def __str__(self):
-        return f"{self.cells} = {self.count}"
+        return f"{bin(self.cells)} = {self.count}"
 
     def known_mines(self):
         """
-        Returns the set of all cells in self.cells known to be mines.
+        Returns the bitmask of all cells in self.cells known to be mines.
         """
-        if len(self.cells) == self.count:
+        if popcount(self.cells) == self.count:
             return self.cells
         
-        return None
+        return 0
 
     def known_safes(self):
         """
-        Returns the set of all cells in self.cells known to be safe.
+        Returns the bitmask of all cells in self.cells known to be safe.
         """
         if self.count == 0:
             return self.cells
 
-        return None
+        return 0
 
-    def mark_mine(self, cell):
+    def mark_mine(self, bits):
         """
         Updates internal knowledge representation given the fact that
-        a cell is known to be a mine.
+        the cells with the given bits are known to be mines.
         """
-        if cell in self.cells:
-            self.cells.remove(cell)
-            self.count -= 1
+        mines = self.cells & bits
+        if mines:
+            self.cells ^= mines
+            self.count -= popcount(mines)
+            self._hash = None
         return None
         
 
-    def mark_safe(self, cell):
+    def mark_safe(self, bits):
         """
         Updates internal knowledge representation given the fact that
-        a cell is known to be safe.
+        the cells with the given bits are known to be safe.
         """
-        if cell in self.cells:
-            self.cells.remove(cell)
+        if self.cells & bits:
+            self.cells &= ~bits
+            self._hash = None
         return None
 
+    def subtract(self, other):
+        """
+        Updates internal knowledge representation given that other's
+        cells are a subset of self.cells, leaving the rest of the cells.
+        """
+        self.cells &= ~other.cells
+        self.count -= other.count
+        self._hash = None
+
 
 class MinesweeperAI():
     """
@@ -159,26 +186,128 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Cells neither clicked on nor known to be mines,
+        # the candidates for a random move
+        self.unexplored = {(i, j) for i in range(height) for j in range(width)}
+
+        # Sentences about the game known to be true, each mapped to
+        # itself so the stored instance of an equal sentence can be
+        # found; only that instance may be removed or changed
+        self.knowledge = {}
+
+        # Sentences in self.knowledge that mention each cell,
+        # indexed by the cell's bit
+        self.cell_index = {}
+
+    def cell_bit(self, cell):
+        """
+        Returns the bit representing cell in a sentence's cells bitmask.
+        """
+        i, j = cell
+        return 1 << (i * self.width + j)
+
+    def cells_of(self, bits):
+        """
+        Yields the cells whose bits are set in bits.
+        """
+        for bit in bits_of(bits):
+            yield divmod(bit.bit_length() - 1, self.width)
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
-        self.mines.add(cell)
-        for sentence in self.knowledge.copy():
-            sentence.mark_mine(cell)
+        self.mark_cells(mines=self.cell_bit(cell))
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
-        self.safes.add(cell)
-        for sentence in self.knowledge.copy():
-            sentence.mark_safe(cell)
+        self.mark_cells(safes=self.cell_bit(cell))
+
+    def mark_cells(self, safes=0, mines=0):
+        """
+        Marks every cell in the safes and mines bitmasks at once,
+        updating each sentence that mentions any of them a single time.
+        Returns the sentences that changed.
+        """
+        self.safes.update(self.cells_of(safes))
+        self.mines.update(self.cells_of(mines))
+        self.unexplored.difference_update(self.cells_of(mines))
+
+        known = safes | mines
+        sentences = set()
+        for bit in bits_of(known):
+            sentences.update(self.cell_index.get(bit, ()))
+        changed = []
+        for sentence in sentences:
+            self.remove_sentence(sentence)
+            sentence.mark_mine(mines)
+            sentence.mark_safe(safes)
+            stored = self.add_sentence(sentence)
+            if stored is not None:
+                changed.append(stored)
+        return changed
+
+    def subsets_of(self, sentence):
+        """
+        Returns a list of the known sentences whose cells are a strict
+        subset of sentence's cells.
+        """
+        cells = sentence.cells
+        candidates = set()
+        for bit in bits_of(cells):
+            candidates.update(self.cell_index.get(bit, ()))
+        return [
+            other for other in candidates
+            if other.cells != cells and other.cells & cells == other.cells
+        ]
+
+    def supersets_of(self, sentence):
+        """
+        Returns a list of the known sentences whose cells are a strict
+        superset of sentence's cells.
+        """
+        cells = sentence.cells
+        candidates = None
+        for bit in bits_of(cells):
+            sentences = self.cell_index.get(bit, set())
+            candidates = set(sentences) if candidates is None else candidates & sentences
+            if not candidates:
+                return []
+        return [other for other in candidates if other.cells != cells]
+
+    def add_sentence(self, sentence):
+        """
+        Adds sentence to the knowledge base, unless it has no cells or an
+        equal sentence is already known. Returns the stored instance,
+        or None if the sentence has no cells.
+        """
+        if not sentence.cells:
+            return None
+        stored = self.knowledge.get(sentence)
+        if stored is not None:
+            return stored
+        self.knowledge[sentence] = sentence
+        for bit in bits_of(sentence.cells):
+            self.cell_index.setdefault(bit, set()).add(sentence)
+        return sentence
+
+    def remove_sentence(self, sentence):
+        """
+        Removes sentence from the knowledge base if it is the stored
+        instance. Must be called before the sentence is changed, since
+        it is hashed by its contents.
+        """
+        if self.knowledge.get(sentence) is sentence:
+            del self.knowledge[sentence]
+            for bit in bits_of(sentence.cells):
+                sentences = self.cell_index[bit]
+                sentences.discard(sentence)
+                if not sentences:
+                    del self.cell_index[bit]
 
     def add_knowledge(self, cell, count):
         """
@@ -208,64 +337,63 @@ class MinesweeperAI():
         
         # Mark the cell as a move that has been made
         self.moves_made.add(cell)
+        self.unexplored.discard(cell)
         
         # mark the cell as safe
-        self.safes.add(cell)
+        changed = self.mark_cells(safes=self.cell_bit(cell))
         
         # add a new sentence to the AI's knowledge base based on the value of `cell` and `count`
         newSentence = self.add_new_sentence(cell, count)
-        if newSentence is None or newSentence.cells is EMPTY_SET:
-            return
-        self.verify_if_safe_or_mine(newSentence)
-        
-        for sentence in self.knowledge:
-            if cell in sentence.cells:
-                sentence.cells.remove(cell)
+        if newSentence is not None:
+            changed.append(newSentence)
                 
-        self.add_inferred()
+        self.add_inferred(changed)
         
         return
         
-    def add_inferred(self):
-        # Compare each sentence, with each other
-        for sentence in self.knowledge:
-            sentenceCellCount = len(sentence.cells)
-            otherSentences = self.knowledge.copy()
-            otherSentences.remove(sentence) 
-            for otherSentence in otherSentences:
-                otherSentenceCellCount = len(otherSentence.cells)
-                if not sentence.cells.issuperset(otherSentence.cells) or sentenceCellCount - otherSentenceCellCount < 1:
+    def add_inferred(self, changed):
+        # Run inference until nothing new follows, only re-checking the
+        # sentences that changed against the sentences sharing their cells
+        dirty = deque(changed)
+        while dirty:
+            # Compare each dirty sentence with the sentences it contains and
+            # is contained in, collecting the cells found safe or mines
+            newSafes = 0
+            newMines = 0
+            while dirty:
+                sentence = dirty.popleft()
+                if self.knowledge.get(sentence) is not sentence:
                     continue
-                sentence.cells -= otherSentence.cells
-                sentence.count -= otherSentence.count
-                self.verify_if_safe_or_mine(sentence)
-                
-            self.verify_if_safe_or_mine(sentence)
 
-                
-    
-    def verify_if_safe_or_mine(self, sentence):
-        for cell in sentence.cells.copy():
-            if cell in self.moves_made or cell in self.safes:
-                self.mark_safe(cell)
-            if cell in self.mines:
-                self.mark_mine(cell)
-        
-        if sentence.known_safes():
-            for sentenceCell in sentence.cells.copy():
-                self.mark_safe(sentenceCell)
-        elif sentence.known_mines():
-            for sentenceCell in sentence.cells.copy():
-                self.mark_mine(sentenceCell)
-                
-        if len(sentence.cells) == 0 and sentence in self.knowledge:
-            self.knowledge.remove(sentence)
-        
-            
-                
+                for otherSentence in self.subsets_of(sentence):
+                    if otherSentence.cells == sentence.cells or sentence.cells & otherSentence.cells != otherSentence.cells:
+                        continue
+                    self.remove_sentence(sentence)
+                    sentence.subtract(otherSentence)
+                    sentence = self.add_sentence(sentence)
+                    if sentence is None:
+                        break
+                if sentence is None:
+                    continue
+
+                for otherSentence in self.supersets_of(sentence):
+                    if self.knowledge.get(otherSentence) is not otherSentence:
+                        continue
+                    self.remove_sentence(otherSentence)
+                    otherSentence.subtract(sentence)
+                    stored = self.add_sentence(otherSentence)
+                    if stored is not None:
+                        dirty.append(stored)
+
+                newSafes |= sentence.known_safes()
+                newMines |= sentence.known_mines()
+
+            # Mark them in one pass, which dirties the sentences it changes
+            dirty.extend(self.mark_cells(newSafes, newMines))
+
     def add_new_sentence(self, cell, count):
         cellAsList = list(cell)
-        newCells = set()
+        newCells = 0
         for i in range(3):
             for j in range(3):
                 firstCoordinate = cellAsList[0] - 1 + i
@@ -277,13 +405,12 @@ class MinesweeperAI():
                     continue
                 
                 newCell = (firstCoordinate, secondCoordinate)
-                if newCell not in self.moves_made:
-                    newCells.add(newCell)
+                if newCell in self.mines:
+                    count -= 1
+                elif newCell not in self.moves_made and newCell not in self.safes:
+                    newCells |= self.cell_bit(newCell)
                 
-        newSentence = Sentence(newCells, count)
-        if newSentence not in self.knowledge:
-            self.knowledge.append(newSentence)
-        return newSentence
+        return self.add_sentence(Sentence(newCells, count))
     
         
     def make_safe_move(self):
@@ -301,6 +428,7 @@ class MinesweeperAI():
             return None
         safeCell = possibleMoves.pop()    
         self.moves_made.add(safeCell)
+        self.unexplored.discard(safeCell)
         print(f"safe cell: {safeCell}")
         return safeCell
 
@@ -311,13 +439,8 @@ class MinesweeperAI():
             1) have not already been chosen, and
             2) are not known to be mines
         """
-        for row in range(self.height):
-            for column in range(self.width): 
-                cell = (row,column)
-                if cell in self.moves_made:
-                    continue
-                elif cell in self.mines:
-                    continue
-                print(f"random cell: {cell}")
-                return cell
-        return None        
+        if not self.unexplored:
+            return None
+        cell = random.choice(tuple(self.unexplored))
+        print(f"random cell: {cell}")
+        return cell        